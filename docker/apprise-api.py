@@ -4,11 +4,32 @@ Minimal Apprise API Server for MeshMonitor
 Provides a simple REST API for sending notifications via Apprise
 """
 import os
-import json
+import gzip
+import threading
 import apprise
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
+# orjson is optional: it is noticeably faster on the small dicts this server
+# encodes/decodes per request, but the stdlib codec keeps the container (and
+# the frozen desktop sidecar) working when it isn't installed.
+try:
+    import orjson
+
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    import json
+
+    def json_dumps(data):
+        return json.dumps(data).encode()
+
+    json_loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
 CONFIG_DIR = os.getenv('APPRISE_CONFIG_DIR', '/apprise-config')
 PORT = int(os.getenv('APPRISE_PORT', '8000'))
 # Bind address. Defaults to all interfaces to preserve the Docker behaviour
@@ -16,27 +37,53 @@ PORT = int(os.getenv('APPRISE_PORT', '8000'))
 # The desktop bundle sets APPRISE_HOST=127.0.0.1 so the frozen sidecar is
 # only reachable from the local machine and never the LAN.
 HOST = os.getenv('APPRISE_HOST', '')
+# JSON responses larger than this are gzipped for clients that accept it
+GZIP_MIN_BYTES = 1024
+# How long POST /notify?batch=1 waits to coalesce notifications (milliseconds)
+BATCH_WINDOW_MS = int(os.getenv('APPRISE_BATCH_WINDOW_MS', '25'))
 
-# Global Apprise object
+# Global Apprise object. Requests are served on separate threads, so
+# load_config() builds a fresh object and swaps it in rather than mutating the
+# one an in-flight notification may be iterating.
 apobj = apprise.Apprise()
 
+# Number of URLs in apobj and their masked previews for GET /urls, refreshed
+# by load_config() so /health (polled by the Node side) and /urls don't have
+# to ask Apprise on every request
+url_count = 0
+masked_urls = ()
+
+# Serializes writers of the config file (concurrent POST /config requests)
+config_lock = threading.Lock()
+
+# Workers for POST /notify?async=1, which queues delivery and returns 202
+# immediately instead of holding the caller until every service responds
+notify_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('APPRISE_NOTIFY_WORKERS', '8')),
+    thread_name_prefix='apprise-notify'
+)
+
 def load_config():
     """Load Apprise URLs from config file"""
+    global apobj, url_count, masked_urls
     config_file = os.path.join(CONFIG_DIR, 'urls.txt')
     if os.path.exists(config_file):
         with open(config_file, 'r') as f:
             urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-            apobj.clear()
+            new_apobj = apprise.Apprise()
             loaded_count = 0
             for url in urls:
                 # Show first 30 chars of URL for debugging (mask sensitive parts)
                 url_preview = url[:30] + '...' if len(url) > 30 else url
-                result = apobj.add(url)
+                result = new_apobj.add(url)
                 if result:
                     loaded_count += 1
                     print(f"✅ Successfully added URL: {url_preview}")
                 else:
                     print(f"❌ Failed to add URL: {url_preview}")
+            apobj = new_apobj
+            masked_urls = tuple({'masked': url[:20] + '...'} for url in new_apobj.urls())
+            url_count = len(masked_urls)
         print(f"✅ Loaded {loaded_count}/{len(urls)} notification URLs from config")
         if loaded_count == 0 and len(urls) > 0:
             print(f"⚠️  WARNING: No URLs were successfully loaded! Check URL format.")
@@ -47,23 +94,135 @@ def save_config(urls):
     """Save Apprise URLs to config file"""
     os.makedirs(CONFIG_DIR, exist_ok=True)
     config_file = os.path.join(CONFIG_DIR, 'urls.txt')
-    with open(config_file, 'w') as f:
-        for url in urls:
-            f.write(f"{url}\n")
-    load_config()
+    with config_lock:
+        with open(config_file, 'w') as f:
+            for url in urls:
+                f.write(f"{url}\n")
+        load_config()
+
+def warm_plugins():
+    """
+    Import every Apprise notification plugin up front. Apprise loads plugin
+    modules lazily, so without this the first notification to a new scheme
+    (typically a user's inline URL) pays the import cost on the request path.
+    """
+    try:
+        apprise.Apprise().details()
+    except Exception as e:
+        print(f"⚠️  Apprise plugin warm-up failed: {e}")
+
+def notify_in_background(target, title, body, notify_type):
+    """Deliver a queued notification, logging the outcome since no caller is waiting"""
+    try:
+        if not target.notify(title=title, body=body, notify_type=notify_type):
+            print(f"❌ Queued notification failed: {title}")
+    except Exception as e:
+        print(f"❌ Queued notification error: {e}")
+
+class NotificationBatcher:
+    """
+    Coalesces POST /notify?batch=1 requests arriving within a short window.
+    Notifications for the same targets with the same title and type are merged
+    into a single Apprise call (bodies separated by a blank line), so a burst
+    of alerts costs one upstream request per service instead of one each.
+    """
+
+    def __init__(self, window_ms):
+        self.window = window_ms / 1000
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.timer = None
+
+    def add(self, key, target, title, body, notify_type):
+        with self.lock:
+            self.pending.append((key, target, title, body, notify_type))
+            if self.timer is None:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            items = list(self.pending)
+            self.pending.clear()
+            self.timer = None
+
+        groups = {}
+        for key, target, title, body, notify_type in items:
+            _, bodies = groups.setdefault((key, title, notify_type), (target, []))
+            bodies.append(body)
+
+        for (_, title, notify_type), (target, bodies) in groups.items():
+            notify_pool.submit(notify_in_background, target, title, '\n\n'.join(bodies), notify_type)
+
+notify_batcher = NotificationBatcher(BATCH_WINDOW_MS)
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip (honours q=0 and '*')"""
+    wildcard_q = None
+    for token in accept_encoding.split(','):
+        coding, _, params = token.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ('gzip', 'x-gzip'):
+            return q > 0
+        if coding == '*':
+            wildcard_q = q
+    return wildcard_q is not None and wildcard_q > 0
 
 class AppriseHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 lets the Node client keep its socket open between requests
+    # instead of reconnecting for every notification. Every response must
+    # therefore carry a Content-Length.
+    protocol_version = 'HTTP/1.1'
+    # Close idle keep-alive connections so they don't pin a thread forever
+    timeout = 60
+    # Buffer the response (the stdlib default is an unbuffered writer) so the
+    # status line, headers and body go out in one write when the request
+    # completes, instead of one send for the headers and another for the body
+    wbufsize = -1
+
     def log_message(self, format, *args):
         """Custom logging to stdout"""
         print(f"[Apprise API] {format % args}")
 
     def send_json_response(self, code, data):
         """Helper to send JSON response"""
+        payload = json_dumps(data)
+        compress = (len(payload) > GZIP_MIN_BYTES
+                    and accepts_gzip(self.headers.get('Accept-Encoding', '')))
+        if compress:
+            # Level 1: most of the size win on JSON for a fraction of the CPU
+            payload = gzip.compress(payload, compresslevel=1)
         self.send_response(code)
         self.send_header('Content-type', 'application/json')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(payload)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(payload)
+
+    def queue_notification(self, target, key, title, body, notify_type, sent_to, batch):
+        """Queue (or batch) a notification for background delivery and answer 202"""
+        if batch:
+            notify_batcher.add(key, target, title, body, notify_type)
+        else:
+            notify_pool.submit(notify_in_background, target, title, body, notify_type)
+        self.send_json_response(202, {
+            'success': True,
+            'message': 'Notification queued',
+            'queued': True,
+            'sent_to': sent_to
+        })
 
     def do_OPTIONS(self):
         """Handle CORS preflight"""
@@ -71,6 +230,7 @@ class AppriseHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_GET(self):
@@ -81,16 +241,15 @@ class AppriseHandler(BaseHTTPRequestHandler):
         if parsed.path == '/health' or parsed.path == '/':
             self.send_json_response(200, {
                 'status': 'ok',
-                'urls_configured': len(apobj),
+                'urls_configured': url_count,
                 'version': apprise.__version__
             })
 
         # Get configured URLs (masked for security)
         elif parsed.path == '/urls':
-            urls = [{'masked': url[:20] + '...'} for url in apobj.urls()]
             self.send_json_response(200, {
-                'count': len(apobj),
-                'urls': urls
+                'count': url_count,
+                'urls': list(masked_urls)
             })
 
         else:
@@ -100,11 +259,11 @@ class AppriseHandler(BaseHTTPRequestHandler):
         """Handle POST requests"""
         parsed = urlparse(self.path)
         content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length).decode('utf-8')
+        body = self.rfile.read(content_length)
 
         try:
-            data = json.loads(body) if body else {}
-        except json.JSONDecodeError:
+            data = json_loads(body) if body else {}
+        except (JSONDecodeError, UnicodeDecodeError):
             self.send_json_response(400, {'error': 'Invalid JSON'})
             return
 
@@ -114,6 +273,11 @@ class AppriseHandler(BaseHTTPRequestHandler):
             body_text = data.get('body', '')
             notify_type = data.get('type', 'info')
             inline_urls = data.get('urls', None)  # Per-user inline URLs
+            # ?async=1 queues delivery and answers 202 without a delivery status;
+            # ?batch=1 does the same but also coalesces with other batched requests
+            query = parse_qs(parsed.query)
+            run_batch = query.get('batch', ['0'])[0].lower() in ('1', 'true')
+            run_async = run_batch or query.get('async', ['0'])[0].lower() in ('1', 'true')
 
             if not body_text:
                 self.send_json_response(400, {'error': 'Body is required'})
@@ -134,11 +298,12 @@ class AppriseHandler(BaseHTTPRequestHandler):
                 if inline_urls and isinstance(inline_urls, list) and len(inline_urls) > 0:
                     # Create a temporary Apprise object for this request
                     temp_apobj = apprise.Apprise()
-                    loaded_count = 0
+                    loaded_urls = []
                     for url in inline_urls:
                         if url and isinstance(url, str) and url.strip():
                             if temp_apobj.add(url.strip()):
-                                loaded_count += 1
+                                loaded_urls.append(url.strip())
+                    loaded_count = len(loaded_urls)
 
                     if loaded_count == 0:
                         self.send_json_response(400, {
@@ -148,6 +313,11 @@ class AppriseHandler(BaseHTTPRequestHandler):
                         })
                         return
 
+                    if run_async:
+                        self.queue_notification(temp_apobj, ('inline',) + tuple(sorted(loaded_urls)),
+                                                title, body_text, apprise_type, loaded_count, run_batch)
+                        return
+
                     # Send notification using temporary Apprise object
                     result = temp_apobj.notify(
                         title=title,
@@ -168,8 +338,11 @@ class AppriseHandler(BaseHTTPRequestHandler):
                             'urls_provided': len(inline_urls)
                         })
                 else:
-                    # Fall back to global config (legacy behavior)
-                    if len(apobj) == 0:
+                    # Fall back to global config (legacy behavior). Take one
+                    # reference so a concurrent /config reload can't swap the
+                    # object out between the checks and the send.
+                    global_apobj = apobj
+                    if len(global_apobj) == 0:
                         self.send_json_response(400, {
                             'success': False,
                             'error': 'No notification URLs configured',
@@ -177,8 +350,13 @@ class AppriseHandler(BaseHTTPRequestHandler):
                         })
                         return
 
+                    if run_async:
+                        self.queue_notification(global_apobj, ('global', id(global_apobj)),
+                                                title, body_text, apprise_type, len(global_apobj), run_batch)
+                        return
+
                     # Send notification using global Apprise object
-                    result = apobj.notify(
+                    result = global_apobj.notify(
                         title=title,
                         body=body_text,
                         notify_type=apprise_type
@@ -188,13 +366,13 @@ class AppriseHandler(BaseHTTPRequestHandler):
                         self.send_json_response(200, {
                             'success': True,
                             'message': 'Notification sent',
-                            'sent_to': len(apobj)
+                            'sent_to': len(global_apobj)
                         })
                     else:
                         self.send_json_response(500, {
                             'success': False,
                             'error': 'Failed to send notification (check logs for details)',
-                            'urls_configured': len(apobj)
+                            'urls_configured': len(global_apobj)
                         })
             except Exception as e:
                 self.send_json_response(500, {
@@ -231,8 +409,12 @@ class AppriseHandler(BaseHTTPRequestHandler):
 def run_server():
     """Start the HTTP server"""
     load_config()
+    # Warm plugins in the background so startup (and /health) isn't delayed
+    threading.Thread(target=warm_plugins, name='apprise-warmup', daemon=True).start()
     server_address = (HOST, PORT)
-    httpd = HTTPServer(server_address, AppriseHandler)
+    # One thread per request: a /notify blocked on a slow upstream service
+    # no longer stalls /health probes or other notifications.
+    httpd = ThreadingHTTPServer(server_address, AppriseHandler)
     print(f"🚀 Apprise API server starting on http://{HOST or '0.0.0.0'}:{PORT}")
     print(f"📁 Config directory: {CONFIG_DIR}")
     print(f"📊 Loaded {len(apobj)} notification URLs")
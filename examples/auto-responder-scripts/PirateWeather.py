@@ -28,6 +28,12 @@ Setup:
    - Response: /data/scripts/PirateWeather.py (or select from script dropdown if available)
    - Click "Save Changes"
 
+Caching:
+- Geocoded locations are cached for 30 days and weather lookups for 10 minutes
+  in WEATHER_CACHE_DIR (default /data/cache). Repeat queries for the same place
+  skip the Nominatim round trip, which also keeps us under its 1 req/s policy.
+  If the directory isn't writable the script simply runs uncached.
+
 Usage:
 - MeshMonitor auto-responder: weather (shows help) or weather {location} (gets weather)
 - Local testing: TEST_MODE=true PARAM_location="City, State" PIRATE_WEATHER_API_KEY=your_key python3 PirateWeather.py
@@ -42,6 +48,7 @@ Made with ❤️ for the MeshMonitor community.
 """
 
 import os
+import re
 import sys
 import json
 import time
@@ -55,12 +62,91 @@ PIRATE_WEATHER_API_KEY = os.environ.get("PIRATE_WEATHER_API_KEY", "")
 # Test mode flag - set to True for local testing
 TEST_MODE = os.environ.get("TEST_MODE", "false").lower() == "true"
 
+# On-disk cache for geocoding and weather lookups
+CACHE_DIR = os.environ.get("WEATHER_CACHE_DIR", "/data/cache")
+GEOCODE_CACHE_TTL = 30 * 24 * 3600  # 30 days - place coordinates rarely change
+WEATHER_CACHE_TTL = 10 * 60  # 10 minutes - collapses bursts of identical requests
+CACHE_MAX_ENTRIES = 500
+
+# Matches a {param} placeholder in a trigger pattern (e.g. "weather {location}")
+PARAM_PATTERN = re.compile(r"\{(\w+)\}")
+
+HELP_TEXT = (
+    "Weather Bot:\n"
+    "• weather help - Show help\n"
+    "• weather {location} - Get weather\n"
+    "Examples:\n"
+    "• weather 90210\n"
+    '• weather "New York, NY"\n'
+    "• weather Paris, France\n"
+    "See script for more details."
+)
+
+# Canned replies are encoded once rather than on every run
+HELP_OUTPUT = json.dumps({"response": HELP_TEXT})
+FALLBACK_ERROR_OUTPUT = '{"response": "Error: Script execution failed"}'
+
 
 class WeatherBot:
     """Weather bot that fetches weather data using Pirate Weather API."""
 
     def __init__(self):
         self.api_key = PIRATE_WEATHER_API_KEY
+        # Cache files are loaded lazily on first lookup
+        self._caches: Dict[str, Dict[str, Any]] = {}
+
+    def _cache_path(self, name: str) -> str:
+        return os.path.join(CACHE_DIR, f"{name}.json")
+
+    def _load_cache(self, name: str) -> Dict[str, Any]:
+        """Load a named cache file, returning an empty cache if missing or unreadable."""
+        if name not in self._caches:
+            try:
+                with open(self._cache_path(name), "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+                if not isinstance(cache, dict):
+                    cache = {}
+            except (OSError, ValueError):
+                cache = {}
+            self._caches[name] = cache
+        return self._caches[name]
+
+    def cache_get(self, name: str, key: str, ttl: int) -> Optional[Any]:
+        """Return a cached value if present and younger than ttl seconds."""
+        entry = self._load_cache(name).get(key)
+        if entry and time.time() - entry.get("ts", 0) < ttl:
+            return entry.get("value")
+        return None
+
+    def cache_put(self, name: str, key: str, value: Any, ttl: int) -> None:
+        """Store a value and persist the cache atomically (tmp file + rename)."""
+        cache = self._load_cache(name)
+        now = time.time()
+        cache.pop(key, None)
+        cache[key] = {"value": value, "ts": now}
+
+        # Drop expired entries, then the oldest ones beyond the size cap
+        for stale_key in [k for k, v in cache.items() if now - v.get("ts", 0) >= ttl]:
+            del cache[stale_key]
+        if len(cache) > CACHE_MAX_ENTRIES:
+            oldest = sorted(cache, key=lambda k: cache[k].get("ts", 0))
+            for old_key in oldest[: len(cache) - CACHE_MAX_ENTRIES]:
+                del cache[old_key]
+
+        path = self._cache_path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Caching is best-effort; never fail a weather lookup over it
+            print(f"Could not write cache {path}: {e}", file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
     def geocode_location(self, location: str) -> Optional[Tuple[float, float]]:
         """
@@ -73,6 +159,11 @@ class WeatherBot:
         Returns:
             Tuple of (latitude, longitude) or None if geocoding fails
         """
+        cache_key = location.strip().lower()
+        cached = self.cache_get("geocode", cache_key, GEOCODE_CACHE_TTL)
+        if cached:
+            return (cached[0], cached[1])
+
         try:
             # Use OpenStreetMap's Nominatim geocoding service (free, no API key required)
             base_url = "https://nominatim.openstreetmap.org/search"
@@ -91,6 +182,7 @@ class WeatherBot:
                 result = data[0]
                 lat = float(result.get("lat"))
                 lng = float(result.get("lon"))
+                self.cache_put("geocode", cache_key, [lat, lng], GEOCODE_CACHE_TTL)
                 return (lat, lng)
 
         except urllib.error.HTTPError as e:
@@ -155,17 +247,25 @@ class WeatherBot:
                     "Please set PIRATE_WEATHER_API_KEY environment variable."
                 }
 
-            # Build API URL
-            url = f"https://api.pirateweather.net/forecast/{self.api_key}/{lat},{lng}"
+            # Only the current conditions and today's forecast are used, so
+            # that is all we cache (the full forecast payload is large)
+            weather_key = f"{lat:.4f},{lng:.4f}"
+            cached = self.cache_get("weather", weather_key, WEATHER_CACHE_TTL)
+            if cached:
+                current = cached.get("currently", {})
+                daily = cached.get("today", {})
+            else:
+                # Build API URL
+                url = f"https://api.pirateweather.net/forecast/{self.api_key}/{lat},{lng}"
 
-            # Make API request
-            req = urllib.request.Request(url)
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode("utf-8"))
+                # Make API request
+                req = urllib.request.Request(url)
+                with urllib.request.urlopen(req, timeout=10) as response:
+                    data = json.loads(response.read().decode("utf-8"))
 
-            # Extract current weather
-            current = data.get("currently", {})
-            daily = data.get("daily", {}).get("data", [{}])[0] if data.get("daily", {}).get("data") else {}
+                # Extract current weather
+                current = data.get("currently", {})
+                daily = data.get("daily", {}).get("data", [{}])[0] if data.get("daily", {}).get("data") else {}
 
             # Format response
             temp = current.get("temperature", "N/A")
@@ -183,6 +283,11 @@ class WeatherBot:
                 f"Humidity: {humidity * 100:.0f}%, Wind: {wind_speed:.0f} mph."
             )
 
+            # Only cache data that formatted cleanly, so an incomplete payload
+            # isn't replayed as an error until the entry expires
+            if not cached:
+                self.cache_put("weather", weather_key, {"currently": current, "today": daily}, WEATHER_CACHE_TTL)
+
             return {"response": response_text}
 
         except urllib.error.HTTPError as e:
@@ -196,16 +301,7 @@ class WeatherBot:
 
     def get_help(self) -> str:
         """Return help text for the weather bot."""
-        return (
-            "Weather Bot:\n"
-            "• weather help - Show help\n"
-            "• weather {location} - Get weather\n"
-            "Examples:\n"
-            "• weather 90210\n"
-            '• weather "New York, NY"\n'
-            "• weather Paris, France\n"
-            "See script for more details."
-        )
+        return HELP_TEXT
 
 
 def main():
@@ -221,10 +317,8 @@ def main():
             trigger_pattern = os.environ.get("TRIGGER", "").strip()
 
             if original_message and trigger_pattern:
-                import re
-
                 # Find {param} in trigger pattern (e.g., "weather {location}")
-                param_match = re.search(r"\{(\w+)\}", trigger_pattern)
+                param_match = PARAM_PATTERN.search(trigger_pattern)
                 if param_match:
                     # Get the trigger prefix (e.g., "weather " from "weather {location}")
                     trigger_prefix = trigger_pattern.split("{")[0].strip()
@@ -237,14 +331,14 @@ def main():
                         elif location.startswith("'") and location.endswith("'"):
                             location = location[1:-1]
 
-        bot = WeatherBot()
-
+        encoded = None
         if not location:
             # No location provided - show help (triggered by "weather" pattern)
-            response = bot.get_help()
+            response = HELP_TEXT
+            encoded = HELP_OUTPUT
         else:
             # Get weather for location
-            result = bot.get_weather(location)
+            result = WeatherBot().get_weather(location)
             if "error" in result:
                 # Invalid location - provide helpful error with usage info
                 error_msg = result["error"]
@@ -258,8 +352,7 @@ def main():
 
         # Output JSON response for MeshMonitor
         try:
-            output = {"response": response}
-            print(json.dumps(output))
+            print(encoded or json.dumps({"response": response}))
             sys.stdout.flush()
 
             if TEST_MODE:
@@ -270,7 +363,7 @@ def main():
                 print(json.dumps(error_output))
                 sys.stdout.flush()
             except:
-                print('{"response": "Error: Script execution failed"}')
+                print(FALLBACK_ERROR_OUTPUT)
                 sys.stdout.flush()
 
     except Exception as e:
@@ -288,7 +381,7 @@ def main():
 
             print(f"Error in weather script: {str(e)}", file=sys.stderr)
         except:
-            print('{"response": "Error: Script execution failed"}')
+            print(FALLBACK_ERROR_OUTPUT)
             sys.stdout.flush()
         finally:
             sys.exit(0)
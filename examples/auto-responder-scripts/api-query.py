@@ -25,6 +25,13 @@ Setup:
    - Response Type: Script
    - Response: /data/scripts/api-query.py
 
+Caching:
+- API responses (node data, including positions) are kept in
+  <temp dir>/mm-cache-<hash>, readable only by the script's user. The node list
+  is reused for 15 seconds and revalidated with its ETag after that. At most
+  100 responses are kept; the least recently used are dropped first. Set
+  MM_API_CACHE_DIR to move the cache, or to an empty value to disable it.
+
 Usage:
 - nodeinfo - Shows info about the sender node
 - nodeinfo !abc12345 - Shows info about a specific node
@@ -35,27 +42,175 @@ Environment Variables Available:
 - MM_LAT, MM_LON: MeshMonitor node location (if known)
 - MM_API_TOKEN: API token for authentication
 - MM_API_URL: Base URL for API (e.g., http://localhost:3001/meshmonitor)
+- MM_API_CACHE_DIR: Where the response cache lives (empty disables it)
 """
 
 import os
 import sys
 import json
-import urllib.request
-import urllib.error
-from typing import Optional, Dict, Any
+import gzip
+import time
+import hashlib
+import tempfile
+import functools
+import http.client
+import urllib.parse
+from typing import Optional, Dict, Any, Tuple
 
 # Configuration
 API_TOKEN = os.environ.get("MM_API_TOKEN", "")
 API_URL = os.environ.get("MM_API_URL", "http://localhost:3001/meshmonitor")
 
+# Parsed once; every request goes to the same host
+_API_BASE = urllib.parse.urlsplit(API_URL.rstrip("/"))
+
+# Kept-alive connection shared by all API calls in this run
+_connection = None
+
+# Followed once, as urlopen() would (e.g. a reverse proxy adding a trailing slash)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Last body (and ETag) per endpoint, kept on disk between runs. Later runs
+# send If-None-Match and reuse the stored body when the server answers 304 Not
+# Modified. The directory is keyed on the URL and token since different tokens
+# may see different nodes. MM_API_CACHE_DIR sets where it is created (default:
+# the system temp dir); an empty value disables the cache.
+_CACHE_KEY = hashlib.sha1(f"{API_URL}|{API_TOKEN}".encode()).hexdigest()[:12]
+_CACHE_PARENT = os.environ.get("MM_API_CACHE_DIR", tempfile.gettempdir())
+RESPONSE_CACHE_DIR = os.path.join(_CACHE_PARENT, f"mm-cache-{_CACHE_KEY}") if _CACHE_PARENT else None
+RESPONSE_CACHE_MAX_FILES = 100
+
+# The full node list is served straight from that cache for this long, so
+# bursts of lookups (several people sending "nodeinfo" at once) share one fetch
+NODES_CACHE_TTL = 15  # seconds
+
+
+def _get_connection(timeout: int) -> http.client.HTTPConnection:
+    """Return the shared connection to the MeshMonitor API, opening it if needed."""
+    global _connection
+    if _connection is None:
+        if _API_BASE.scheme == "https":
+            _connection = http.client.HTTPSConnection(_API_BASE.netloc, timeout=timeout)
+        else:
+            _connection = http.client.HTTPConnection(_API_BASE.netloc, timeout=timeout)
+    return _connection
 
-def api_request(endpoint: str, timeout: int = 5) -> Optional[Dict[str, Any]]:
+
+def _close_connection() -> None:
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def _send(path: str, headers: Dict[str, str], timeout: int) -> Tuple[Any, bytes]:
+    """GET path over the shared connection, retrying once if the server dropped it."""
+    for attempt in range(2):
+        conn = _get_connection(timeout)
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            return response, response.read()
+        except (ConnectionResetError, BrokenPipeError):
+            # The server closed the idle kept-alive socket; retry once on a fresh one
+            _close_connection()
+            if attempt == 1:
+                raise
+
+
+def _follow_redirect(path: str, location: str, headers: Dict[str, str],
+                     timeout: int) -> Tuple[Any, bytes]:
+    """
+    GET the target of a 3xx response, as urlopen() would have done for us.
+
+    Same-origin targets reuse the shared connection; anything else gets a
+    one-off connection, and the API token is only sent on to the same host.
+    """
+    current_url = f"{_API_BASE.scheme}://{_API_BASE.netloc}{path}"
+    target = urllib.parse.urlsplit(urllib.parse.urljoin(current_url, location))
+    target_path = urllib.parse.urlunsplit(("", "", target.path or "/", target.query, ""))
+    if (target.scheme, target.netloc) == (_API_BASE.scheme, _API_BASE.netloc):
+        return _send(target_path, headers, timeout)
+
+    if target.hostname != _API_BASE.hostname:
+        headers = {k: v for k, v in headers.items() if k != "Authorization"}
+    if target.scheme == "https":
+        conn = http.client.HTTPSConnection(target.netloc, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(target.netloc, timeout=timeout)
+    try:
+        conn.request("GET", target_path, headers=headers)
+        response = conn.getresponse()
+        return response, response.read()
+    finally:
+        conn.close()
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Persist data as JSON atomically (tmp file + rename), readable only by this user."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write cache {path}: {e}", file=sys.stderr)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _response_cache_path(endpoint: str) -> Optional[str]:
+    if not RESPONSE_CACHE_DIR:
+        return None
+    return os.path.join(RESPONSE_CACHE_DIR, f"{hashlib.sha1(endpoint.encode()).hexdigest()}.json")
+
+
+def _prune_response_cache() -> None:
+    """Drop the least recently used files beyond RESPONSE_CACHE_MAX_FILES."""
+    try:
+        entries = [e for e in os.scandir(RESPONSE_CACHE_DIR) if e.name.endswith(".json")]
+        if len(entries) <= RESPONSE_CACHE_MAX_FILES:
+            return
+        # A 304 touches its file, so mtime is the last time an entry was used
+        entries.sort(key=lambda e: e.stat().st_mtime)
+    except OSError:
+        return
+    for entry in entries[: len(entries) - RESPONSE_CACHE_MAX_FILES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _read_response_cache(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if isinstance(cached, dict) and "body" in cached:
+            return cached
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+@functools.lru_cache(maxsize=32)
+def api_request(endpoint: str, timeout: int = 5, max_age: int = 0) -> Optional[Dict[str, Any]]:
     """
     Make an authenticated request to the MeshMonitor v1 API.
 
+    Results are memoized for the lifetime of this (short-lived) script, so
+    repeated lookups of the same endpoint cost one round trip. Across runs,
+    the last response is revalidated with its ETag so an unchanged resource
+    comes back as an empty 304.
+
     Args:
         endpoint: API endpoint (e.g., '/api/v1/nodes')
         timeout: Request timeout in seconds
+        max_age: Serve the stored body without a request if it was fetched
+            or revalidated less than this many seconds ago
 
     Returns:
         Parsed JSON response or None on error
@@ -63,22 +218,57 @@ def api_request(endpoint: str, timeout: int = 5) -> Optional[Dict[str, Any]]:
     if not API_TOKEN:
         return None
 
-    url = f"{API_URL.rstrip('/')}{endpoint}"
+    path = f"{_API_BASE.path}{endpoint}"
     headers = {
         "Authorization": f"Bearer {API_TOKEN}",
         "Accept": "application/json",
+        "Accept-Encoding": "gzip",
         "User-Agent": "MeshMonitor-Script/1.0"
     }
 
+    cache_path = _response_cache_path(endpoint)
+    cached = _read_response_cache(cache_path) if cache_path else None
+    if cached and max_age:
+        try:
+            if time.time() - os.path.getmtime(cache_path) < max_age:
+                return cached["body"]
+        except OSError:
+            pass
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            return json.loads(response.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        print(f"API HTTP error: {e.code}", file=sys.stderr)
-        return None
-    except urllib.error.URLError as e:
-        print(f"API URL error: {e.reason}", file=sys.stderr)
+        response, body = _send(path, headers, timeout)
+        location = response.getheader("Location")
+        if response.status in REDIRECT_STATUSES and location:
+            response, body = _follow_redirect(path, location, headers, timeout)
+
+        if response.status == 304 and cached:
+            # Still current: restart the max_age window without rewriting the body
+            try:
+                os.utime(cache_path)
+            except OSError:
+                pass
+            return cached["body"]
+        if response.status != 200:
+            print(f"API HTTP error: {response.status}", file=sys.stderr)
+            return None
+        if response.getheader("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        result = json.loads(body.decode("utf-8"))
+
+        etag = response.getheader("ETag")
+        if cache_path and (etag or max_age):
+            try:
+                os.makedirs(RESPONSE_CACHE_DIR, mode=0o700, exist_ok=True)
+            except OSError:
+                pass
+            _write_json_atomic(cache_path, {"etag": etag, "body": result})
+            _prune_response_cache()
+        return result
+    except (http.client.HTTPException, OSError) as e:
+        _close_connection()
+        print(f"API URL error: {e}", file=sys.stderr)
         return None
     except Exception as e:
         print(f"API error: {e}", file=sys.stderr)
@@ -102,57 +292,51 @@ def get_node_info(node_id: str) -> Optional[Dict[str, Any]]:
 
 
 def get_all_nodes() -> list:
-    """Get all nodes from the mesh network."""
-    result = api_request("/api/v1/nodes")
+    """Get all nodes from the mesh network (reused from disk for NODES_CACHE_TTL seconds)."""
+    result = api_request("/api/v1/nodes", max_age=NODES_CACHE_TTL)
     if result and result.get("success"):
         return result.get("data", [])
     return []
 
 
-def format_node_info(node: Dict[str, Any]) -> str:
-    """Format node information for display."""
-    parts = []
+def format_last_seen(last_heard: Any, now: int) -> Optional[str]:
+    """Format a lastHeard timestamp as relative time, or None if unusable."""
+    try:
+        elapsed = now - int(last_heard)
+    except (ValueError, TypeError):
+        return None
+    if elapsed < 60:
+        return f"Seen: {elapsed}s ago"
+    if elapsed < 3600:
+        return f"Seen: {elapsed // 60}m ago"
+    if elapsed < 86400:
+        return f"Seen: {elapsed // 3600}h ago"
+    return f"Seen: {elapsed // 86400}d ago"
 
-    # Basic info
-    name = node.get("longName") or node.get("shortName") or "Unknown"
-    node_id = node.get("nodeId", "?")
-    parts.append(f"{name} ({node_id})")
 
-    # Hardware
-    hw_model = node.get("hwModel")
-    if hw_model:
-        parts.append(f"HW: {hw_model}")
+def format_node_info(node: Dict[str, Any], now: Optional[int] = None) -> str:
+    """
+    Format node information for display.
 
-    # Location
+    Pass now when formatting many nodes so the clock is read once.
+    """
+    if now is None:
+        now = int(time.time())
+
+    name = node.get("longName") or node.get("shortName") or "Unknown"
+    hw_model = node.get("hwModel")
     lat = node.get("latitude")
     lon = node.get("longitude")
-    if lat and lon:
-        parts.append(f"Loc: {lat:.4f},{lon:.4f}")
-
-    # Battery
     battery = node.get("batteryLevel")
-    if battery and battery > 0:
-        parts.append(f"Batt: {battery}%")
-
-    # Last seen
     last_heard = node.get("lastHeard")
-    if last_heard:
-        # Convert to relative time
-        import time
-        try:
-            elapsed = int(time.time()) - int(last_heard)
-            if elapsed < 60:
-                parts.append(f"Seen: {elapsed}s ago")
-            elif elapsed < 3600:
-                parts.append(f"Seen: {elapsed // 60}m ago")
-            elif elapsed < 86400:
-                parts.append(f"Seen: {elapsed // 3600}h ago")
-            else:
-                parts.append(f"Seen: {elapsed // 86400}d ago")
-        except (ValueError, TypeError):
-            pass
 
-    return " | ".join(parts)
+    return " | ".join(filter(None, (
+        f"{name} ({node.get('nodeId', '?')})",
+        f"HW: {hw_model}" if hw_model else None,
+        f"Loc: {lat:.4f},{lon:.4f}" if lat and lon else None,
+        f"Batt: {battery}%" if battery and battery > 0 else None,
+        format_last_seen(last_heard, now) if last_heard else None,
+    )))
 
 
 def main():
@@ -198,12 +382,19 @@ def main():
             info = format_node_info(node)
             output = {"response": info[:200]}  # Truncate to Meshtastic limit
         else:
-            # Try to find by searching all nodes
+            # Try to find by searching all nodes: exact ID first via a dict
+            # index, then fall back to a substring match
             all_nodes = get_all_nodes()
-            matching = [n for n in all_nodes if target_node_id.lower() in (n.get("nodeId", "").lower())]
-
-            if matching:
-                info = format_node_info(matching[0])
+            target_lower = target_node_id.lower()
+            nodes_by_id = {}
+            for n in all_nodes:
+                nodes_by_id.setdefault(n.get("nodeId", "").lower(), n)
+            match = nodes_by_id.get(target_lower)
+            if match is None:
+                match = next((n for node_id, n in nodes_by_id.items() if target_lower in node_id), None)
+
+            if match:
+                info = format_node_info(match)
                 output = {"response": info[:200]}
             else:
                 output = {"response": f"Node {target_node_id} not found"}
@@ -9,6 +9,10 @@ Battery Status Monitor for Auto Responder
 Reports battery status for a configured list of nodes.
 Queries the MeshMonitor SQLite database directly.
 
+All monitored nodes are fetched with a single read-only query. The lookup by
+nodeId is served by the nodes_nodeId_sourceId_uniq index MeshMonitor already
+maintains, so no extra index is needed.
+
 Trigger examples: battery, batt, batteries
 
 Environment variables available:
@@ -21,6 +25,7 @@ import json
 import sqlite3
 import sys
 import time
+from contextlib import closing
 
 # =============================================================================
 # CONFIGURATION - Edit this list with your node IDs (hex format with ! prefix)
@@ -34,45 +39,51 @@ MONITORED_NODES = [
 DATABASE_PATH = "/data/meshmonitor.db"
 
 
-def format_relative_time(timestamp):
+# (exclusive upper bound in seconds, divisor, suffix); None means unbounded
+RELATIVE_TIME_UNITS = (
+    (3600, 60, "m"),
+    (86400, 3600, "h"),
+    (None, 86400, "d"),
+)
+
+
+def format_relative_time(timestamp, now=None):
     """Convert Unix timestamp to relative time string."""
     if not timestamp:
         return "unknown"
-
-    now = int(time.time())
+    if now is None:
+        now = int(time.time())
     diff = now - timestamp
-
     if diff < 60:
         return "now"
-    elif diff < 3600:
-        mins = diff // 60
-        return f"{mins}m ago"
-    elif diff < 86400:
-        hours = diff // 3600
-        return f"{hours}h ago"
-    else:
-        days = diff // 86400
-        return f"{days}d ago"
+    for limit, divisor, suffix in RELATIVE_TIME_UNITS:
+        if limit is None or diff < limit:
+            return f"{diff // divisor}{suffix} ago"
 
 
-def get_battery_status(conn, node_id):
-    """Query battery status for a single node."""
+def get_battery_statuses(conn, node_ids):
+    """Query battery status for all nodes in one statement, keyed by nodeId."""
+    placeholders = ",".join("?" * len(node_ids))
     cursor = conn.cursor()
+    # A node heard by several sources has one row per source; ordering by
+    # lastHeard lets the most recently heard row win in the dict below.
     cursor.execute(
-        """SELECT shortName, longName, batteryLevel, voltage, lastHeard
-           FROM nodes WHERE nodeId = ?""",
-        (node_id,)
+        f"""SELECT nodeId, shortName, longName, batteryLevel, voltage, lastHeard
+            FROM nodes WHERE nodeId IN ({placeholders})
+            ORDER BY lastHeard""",
+        node_ids
     )
-    return cursor.fetchone()
+    return {row["nodeId"]: row for row in cursor.fetchall()}
 
 
-def format_node_status(row):
+def format_node_status(row, now=None):
     """Format a single node's battery status."""
     if not row:
         return None
 
-    short_name, long_name, battery, voltage, last_heard = row
-    name = short_name or long_name or "Unknown"
+    name = row["shortName"] or row["longName"] or "Unknown"
+    battery = row["batteryLevel"]
+    voltage = row["voltage"]
 
     # Build status string
     parts = [name + ":"]
@@ -85,7 +96,7 @@ def format_node_status(row):
     if voltage is not None:
         parts.append(f"{voltage:.1f}V")
 
-    parts.append(f"({format_relative_time(last_heard)})")
+    parts.append(f"({format_relative_time(row['lastHeard'], now)})")
 
     return " ".join(parts)
 
@@ -98,25 +109,30 @@ def main():
             }))
             return
 
-        conn = sqlite3.connect(DATABASE_PATH)
+        # Ensure node IDs have ! prefix
+        node_ids = [n if n.startswith("!") else "!" + n for n in MONITORED_NODES]
 
-        statuses = []
-        for node_id in MONITORED_NODES:
-            # Ensure node ID has ! prefix
-            if not node_id.startswith("!"):
-                node_id = "!" + node_id
+        # Read-only: never takes a write lock on the live MeshMonitor database.
+        # MeshMonitor runs it in WAL mode, so this read doesn't block its writer
+        # either. One connection, one query, closed even if the query fails.
+        with closing(sqlite3.connect(f"file:{DATABASE_PATH}?mode=ro", uri=True)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=1")
+            rows = get_battery_statuses(conn, node_ids)
 
-            row = get_battery_status(conn, node_id)
+        # One clock reading for the whole report
+        now = int(time.time())
+        statuses = []
+        for node_id in node_ids:
+            row = rows.get(node_id)
             if row:
-                status = format_node_status(row)
+                status = format_node_status(row, now)
                 if status:
                     statuses.append(status)
             else:
                 # Node not found in database
                 statuses.append(f"{node_id}: not found")
 
-        conn.close()
-
         if not statuses:
             print(json.dumps({"response": "No battery data available"}))
             return
@@ -32,10 +32,13 @@ Environment Variables Used:
 """
 
 import os
+import sys
 import json
 import math
 from typing import Optional, Tuple
 
+COMPASS_DIRECTIONS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
+
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -64,6 +67,29 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return R * c
 
 
+def great_circle_approx(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Equirectangular approximation of the great-circle distance in kilometers.
+
+    Needs two trig calls instead of haversine's six and is within a fraction
+    of a percent for the short spans typical of a mesh (see distance_km()).
+    """
+    mean_lat = math.radians((lat1 + lat2) / 2)
+    x = math.radians(lon2 - lon1) * math.cos(mean_lat)
+    y = math.radians(lat2 - lat1)
+    return 6371 * math.hypot(x, y)
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Distance in kilometers, using the cheap approximation when both points are
+    within 2 degrees of each other (~200 km) and full haversine otherwise.
+    """
+    if abs(lat2 - lat1) < 2 and abs(lon2 - lon1) < 2:
+        return great_circle_approx(lat1, lon1, lat2, lon2)
+    return haversine(lat1, lon1, lat2, lon2)
+
+
 def km_to_miles(km: float) -> float:
     """Convert kilometers to miles."""
     return km * 0.621371
@@ -94,16 +120,13 @@ def get_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
 
 def bearing_to_direction(bearing: float) -> str:
     """Convert bearing to compass direction."""
-    directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-    index = round(bearing / 45) % 8
-    return directions[index]
+    # Shift by half a sector so each direction covers +/-22.5 degrees, then
+    # wrap 360 back onto N with a mask (8 sectors)
+    return COMPASS_DIRECTIONS[int((bearing + 22.5) // 45) & 7]
 
 
-def get_location(lat_var: str, lon_var: str) -> Optional[Tuple[float, float]]:
-    """Get location from environment variables."""
-    lat = os.environ.get(lat_var)
-    lon = os.environ.get(lon_var)
-
+def parse_location(lat: Optional[str], lon: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse a latitude/longitude pair from raw environment variable values."""
     if lat and lon:
         try:
             return (float(lat), float(lon))
@@ -116,10 +139,15 @@ def main():
     """Main function to calculate and report distance."""
     try:
         # Get locations from environment
-        from_loc = get_location("FROM_LAT", "FROM_LON")
-        mm_loc = get_location("MM_LAT", "MM_LON")
-        from_node = os.environ.get("FROM_NODE", "?")
-        short_name = "!{}".format("{0:04x}".format(int(from_node))[4:])
+        env = os.environ
+        from_loc = parse_location(env.get("FROM_LAT"), env.get("FROM_LON"))
+        mm_loc = parse_location(env.get("MM_LAT"), env.get("MM_LON"))
+        from_node = env.get("FROM_NODE", "?")
+        try:
+            node_int = int(from_node)
+        except ValueError:
+            node_int = 0
+        short_name = f"!{node_int & 0xFFFF:04x}"
 
         # Check if both locations are available
         if not from_loc:
@@ -139,7 +167,7 @@ def main():
             return
 
         # Calculate distance
-        dist_km = haversine(from_loc[0], from_loc[1], mm_loc[0], mm_loc[1])
+        dist_km = distance_km(from_loc[0], from_loc[1], mm_loc[0], mm_loc[1])
         dist_mi = km_to_miles(dist_km)
 
         # Calculate bearing (from sender to MM)
@@ -259,7 +259,7 @@ echo ""
 echo "Step 8: Creating Python virtual environment for Apprise..."
 
 chroot "$ROOTFS_DIR" python3 -m venv /opt/apprise-venv
-chroot "$ROOTFS_DIR" /opt/apprise-venv/bin/pip install --no-cache-dir apprise "paho-mqtt<2.0" meshtastic meshcore
+chroot "$ROOTFS_DIR" /opt/apprise-venv/bin/pip install --no-cache-dir apprise orjson "paho-mqtt<2.0" meshtastic meshcore
 
 # Create python symlink for user scripts that use #!/usr/bin/env python
 chroot "$ROOTFS_DIR" ln -sf /usr/bin/python3 /usr/bin/python